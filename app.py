@@ -31,6 +31,23 @@ if "shares" not in st.session_state:
     # shares[person][item] = qty
     st.session_state.shares = defaultdict(lambda: defaultdict(float))
 
+if "used" not in st.session_state:
+    # used[item] = total qty assigned across all people (kept in sync with shares).
+    # Seed from shares, which survive script reloads while this key may be new.
+    st.session_state["used"] = defaultdict(float)
+    for person_shares in st.session_state.shares.values():
+        for item, qty in person_shares.items():
+            st.session_state["used"][item] += qty
+
+if "active_payers" not in st.session_state:
+    # people with at least one positive share (kept in sync with shares),
+    # seeded from shares in case they survived a script reload
+    st.session_state["active_payers"] = {
+        p
+        for p, person_shares in st.session_state.shares.items()
+        if any(v > 0 for v in person_shares.values())
+    }
+
 if "tax" not in st.session_state:
     # total tax/service amount to split among payers
     st.session_state["tax"] = 0.0
@@ -86,17 +103,55 @@ def add_person(name, email):
     _ = st.session_state.shares[name]  # ensure key exists
 
 
-def unit_price(item):
-    data = st.session_state["items"][item]
-    return data["total_price"] / data["qty"] if data["qty"] else 0.0
+def _items_sig():
+    # Insertion order is kept so tables built from the signature list items as added
+    return tuple(
+        (n, d["qty"], d["total_price"])
+        for n, d in st.session_state["items"].items()
+    )
+
 
+@st.cache_data(show_spinner=False, max_entries=32)
+def _unit_prices_cached(items_sig):
+    return {n: (price / qty if qty else 0.0) for n, qty, price in items_sig}
 
-def remaining_qty(item):
-    used = sum(
+
+def _unit_prices():
+    """Return {item: unit_price} for all items, computed once per items change."""
+    return _unit_prices_cached(_items_sig())
+
+
+def _recount_used(item):
+    # Re-sum from shares on writes so the ledger never drifts from the real total
+    st.session_state["used"][item] = sum(
         st.session_state.shares[p].get(item, 0)
         for p in st.session_state.shares
     )
-    return st.session_state["items"][item]["qty"] - used
+
+
+def remaining_qty(item):
+    return st.session_state["items"][item]["qty"] - st.session_state["used"].get(item, 0.0)
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def _items_df(items_sig, remaining_sig):
+    """Build the Bill Items display table with numeric columns pre-formatted.
+
+    remaining_sig holds remaining_qty() for each item, in items_sig order.
+    """
+    up = _unit_prices_cached(items_sig)
+    return pd.DataFrame(
+        [
+            {
+                "Item": n,
+                "Qty": fmt_num(qty),
+                "Total": fmt_num(price),
+                "Unit": fmt_num(up[n]),
+                "Remaining": fmt_num(remaining),
+            }
+            for (n, qty, price), remaining in zip(items_sig, remaining_sig)
+        ]
+    )
 
 
 def assign_share(person, item, qty):
@@ -110,6 +165,8 @@ def assign_share(person, item, qty):
     if qty > remaining_qty(item):
         return f"Not enough '{item}' left. Remaining: {remaining_qty(item)}"
     st.session_state.shares[person][item] += qty
+    _recount_used(item)
+    st.session_state["active_payers"].add(person)
     return None
 
 
@@ -134,29 +191,27 @@ def set_share(person, item, qty):
     if qty_f > available:
         return f"Not enough '{item}' left. Available: {fmt_num(available)}"
     st.session_state.shares[person][item] = qty_f
+    _recount_used(item)
+    if qty_f > 0:
+        st.session_state["active_payers"].add(person)
+    elif not any(v > 0 for v in st.session_state.shares[person].values()):
+        st.session_state["active_payers"].discard(person)
     return None
 
 
-def person_total(person):
-    total = 0.0
-    for item, qty in st.session_state.shares[person].items():
-        total += qty * unit_price(item)
-    return total
-
-
-def person_breakdown(person):
+def person_breakdown(person, up):
     """Return a list of dicts describing what the person ordered and costs."""
     lines = []
     for item, qty in st.session_state.shares[person].items():
         if qty <= 0:
             continue
-        up = unit_price(item)
+        unit = up[item]
         lines.append(
             {
                 "item": item,
                 "qty": qty,
-                "unit": round(up, 2),
-                "subtotal": round(qty * up, 2),
+                "unit": round(unit, 2),
+                "subtotal": round(qty * unit, 2),
             }
         )
     return lines
@@ -176,29 +231,40 @@ def fmt_num(value):
         v = float(value)
     except Exception:
         return str(value)
+    # Whole numbers (the common case for bills) skip the decimal formatting
+    if v.is_integer():
+        return f"{int(v):,}"
     s = f"{v:,.2f}"
-    if s.endswith(".00"):
-        return s[:-3]
-    # strip trailing zeros like 7,000.50 -> 7,000.5
+    # strip trailing zeros like 7,000.50 -> 7,000.5 (or 7,000.001 -> 7,000)
     if "." in s:
         s = s.rstrip("0").rstrip(".")
     return s
 
 
-def all_totals():
-    # Compute subtotal per person, then split tax proportionally and return final totals
-    subtotals = {
-        p: round(person_total(p), 2)
-        for p in st.session_state.people.keys()
-        if any(st.session_state.shares[p].values())
-    }
+def all_totals(up):
+    """Compute subtotal per person, then split tax proportionally.
+
+    Returns a tuple (subtotals, tax_shares, totals, total_sub) so callers can
+    reuse the per-person figures instead of recomputing them.
+    """
+    active = st.session_state["active_payers"]
+    subtotals = {}
+    for p in st.session_state.people.keys():
+        if p not in active:
+            continue
+        total = 0.0
+        for item, qty in st.session_state.shares[p].items():
+            total += qty * up[item]
+        subtotals[p] = round(total, 2)
     total_sub = sum(subtotals.values())
     tax_total = float(st.session_state.get("tax", 0.0))
+    tax_shares = {}
     totals = {}
     for p, sub in subtotals.items():
         tax_share = (sub / total_sub * tax_total) if total_sub > 0 else 0.0
+        tax_shares[p] = tax_share
         totals[p] = round(sub + tax_share, 2)
-    return totals
+    return subtotals, tax_shares, totals, total_sub
 
 
 def accounts_text():
@@ -211,8 +277,7 @@ def accounts_text():
     return "\n".join(lines)
 
 
-def build_email_body(person):
-    total = round(person_total(person), 2)
+def build_email_body(person, up, subtotals, total_sub, tax_total):
     rest_lines = []
     rest = st.session_state.get("restaurant", {})
     if rest.get("name"):
@@ -231,14 +296,12 @@ def build_email_body(person):
 
     for item, qty in st.session_state.shares[person].items():
         if qty > 0:
-            up = unit_price(item)
-            price = qty * up
-            lines.append(f"- {item}: {fmt_num(qty)} x {fmt_num(up)} = {fmt_num(price)}")
+            unit = up[item]
+            price = qty * unit
+            lines.append(f"- {item}: {fmt_num(qty)} x {fmt_num(unit)} = {fmt_num(price)}")
     # Tax split
-    subtotal = round(person_total(person), 2)
-    total_all = sum(round(person_total(p), 2) for p in st.session_state.people.keys() if any(st.session_state.shares[p].values()))
-    tax_total = float(st.session_state.get("tax", 0.0))
-    tax_share = (subtotal / total_all * tax_total) if total_all > 0 else 0.0
+    subtotal = subtotals[person]
+    tax_share = (subtotal / total_sub * tax_total) if total_sub > 0 else 0.0
     total_incl_tax = subtotal + tax_share
 
     lines += [
@@ -254,50 +317,77 @@ def build_email_body(person):
     return "\n".join(lines)
 
 
-def build_bill_image(totals):
-    """
-    Create a simple PNG summary:
-    - Initiator info
-    - Payment accounts
-    - Person totals
-    """
+@st.cache_resource(show_spinner=False)
+def _get_fonts():
+    """Load the PNG summary fonts once per process."""
+    try:
+        font = ImageFont.truetype("arial.ttf", 18)
+        font_bold = ImageFont.truetype("arialbd.ttf", 22)
+    except OSError:
+        font = ImageFont.load_default()
+        font_bold = font
+    return font, font_bold
+
+
+def _bill_image_sig(totals, up):
+    """Collect everything the PNG summary depends on into a hashable tuple."""
     initiator = st.session_state.initiator
+    rest = st.session_state.get("restaurant", {})
+    shares = tuple(
+        (
+            person,
+            st.session_state.people.get(person, {}).get("email", ""),
+            total,
+            tuple(
+                (item, qty, up[item])
+                for item, qty in st.session_state.shares[person].items()
+                if qty > 0
+            ),
+        )
+        for person, total in totals.items()
+    )
+    return (
+        (initiator["name"], initiator["email"]),
+        tuple((acc["label"], acc["detail"]) for acc in initiator["accounts"]),
+        (rest.get("name", ""), rest.get("address", ""), rest.get("phone", "")),
+        shares,
+    )
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def _build_bill_image_cached(state_sig):
+    initiator, accounts, rest, shares = state_sig
+    rest_name, rest_address, rest_phone = rest
     lines = []
 
     lines.append("Split Bill Summary")
     # Restaurant header (if provided)
-    rest = st.session_state.get("restaurant", {})
-    if rest.get("name"):
-        lines.append(f"{rest.get('name')}")
-    if rest.get("address"):
-        lines.append(rest.get("address"))
-    if rest.get("phone"):
-        lines.append(f"Ph: {rest.get('phone')}")
-
-    if initiator["name"] or initiator["email"]:
-        lines.append(
-            f"Initiator: {initiator['name']} ({initiator['email']})".strip()
-        )
-
-    if initiator["accounts"]:
+    if rest_name:
+        lines.append(f"{rest_name}")
+    if rest_address:
+        lines.append(rest_address)
+    if rest_phone:
+        lines.append(f"Ph: {rest_phone}")
+
+    init_name, init_email = initiator
+    if init_name or init_email:
+        lines.append(f"Initiator: {init_name} ({init_email})".strip())
+
+    if accounts:
         lines.append("")
         lines.append("Payment Accounts:")
-        for acc in initiator["accounts"]:
-            lines.append(f"- {acc['label']}: {acc['detail']}")
+        for label, detail in accounts:
+            lines.append(f"- {label}: {detail}")
 
     lines.append("")
     lines.append("")
     lines.append("Details per person:")
-    for person, total in totals.items():
-        email = st.session_state.people.get(person, {}).get("email", "")
+    for person, email, total, items in shares:
         header = f"{person} ({email})" if email else person
         lines.append(f"- {header}: {fmt_num(total)}")
         # List items for this person
-        for item, qty in st.session_state.shares[person].items():
-            if qty <= 0:
-                continue
-            up = unit_price(item)
-            lines.append(f"    * {item}: {fmt_num(qty)} x {fmt_num(up)} = {fmt_num(qty * up)}")
+        for item, qty, unit in items:
+            lines.append(f"    * {item}: {fmt_num(qty)} x {fmt_num(unit)} = {fmt_num(qty * unit)}")
 
     # Image layout
     width = 900
@@ -307,12 +397,7 @@ def build_bill_image(totals):
 
     img = Image.new("RGB", (width, height), "white")
     draw = ImageDraw.Draw(img)
-    try:
-        font = ImageFont.truetype("arial.ttf", 18)
-        font_bold = ImageFont.truetype("arialbd.ttf", 22)
-    except:
-        font = ImageFont.load_default()
-        font_bold = font
+    font, font_bold = _get_fonts()
 
     y = padding
     for i, line in enumerate(lines):
@@ -321,9 +406,23 @@ def build_bill_image(totals):
         y += line_height
 
     buf = BytesIO()
-    img.save(buf, format="PNG")
-    buf.seek(0)
-    return buf
+    # Low zlib level: the image is small and mostly white, so higher levels
+    # cost CPU without a meaningful size win
+    img.save(buf, format="PNG", optimize=False, compress_level=1)
+    return buf.getvalue()
+
+
+def build_bill_image(totals, up):
+    """
+    Create a simple PNG summary and return it as bytes:
+    - Initiator info
+    - Payment accounts
+    - Person totals
+
+    Rendering is cached on a signature of the inputs, so unrelated reruns
+    reuse the previously encoded PNG.
+    """
+    return _build_bill_image_cached(_bill_image_sig(totals, up))
 
 # ========== UI FLOW ==========
 
@@ -390,23 +489,9 @@ with st.form("add_item_form", clear_on_submit=True):
             st.success(msg)
 
 if st.session_state["items"]:
-    items_df = pd.DataFrame(
-        [
-            {
-                "Item": n,
-                "Qty": d["qty"],
-                "Total": d["total_price"],
-                "Unit": unit_price(n),
-                "Remaining": remaining_qty(n),
-            }
-            for n, d in st.session_state["items"].items()
-        ]
-    )
-    # Format numeric columns for display
-    for col in ["Qty", "Total", "Unit", "Remaining"]:
-        if col in items_df.columns:
-            items_df[col] = items_df[col].apply(fmt_num)
-    st.table(items_df)
+    items_sig = _items_sig()
+    remaining_sig = tuple(remaining_qty(n) for n, _, _ in items_sig)
+    st.table(_items_df(items_sig, remaining_sig))
 
 st.markdown("---")
 
@@ -465,9 +550,14 @@ if st.session_state.people and st.session_state["items"]:
             if email:
                 st.write(f"Email: {email}")
             item_keys = list(st.session_state["items"].keys())
-            # Render inputs for each item
+            # Render inputs for each item, skipping ones this person can neither
+            # hold nor take (nothing assigned and nothing left)
+            shown = []
             for item in item_keys:
                 cur = st.session_state.shares[person].get(item, 0.0)
+                if cur == 0 and remaining_qty(item) == 0:
+                    continue
+                shown.append(item)
                 key = f"edit_{person}_{item}".replace(" ", "_")
                 # Initialize key with current value if not present
                 if key not in st.session_state:
@@ -476,9 +566,12 @@ if st.session_state.people and st.session_state["items"]:
             # Update button per person
             if st.button(f"Update {person}'s assignments", key=f"update_{person}"):
                 errs = []
-                for item in item_keys:
+                for item in shown:
                     key = f"edit_{person}_{item}".replace(" ", "_")
                     newq = float(st.session_state.get(key, 0.0))
+                    cur = st.session_state.shares[person].get(item, 0.0)
+                    if abs(newq - cur) < 1e-9:
+                        continue
                     err = set_share(person, item, newq)
                     if err:
                         errs.append((item, err))
@@ -503,7 +596,8 @@ st.session_state["tax"] = st.number_input(
     "Additional Tax / Service (total amount)", min_value=0.0, step=1.0, value=float(st.session_state.get("tax", 0.0))
 )
 
-totals = all_totals()
+up = _unit_prices()
+subtotals, tax_shares, totals, total_sub = all_totals(up)
 
 if totals:
     # Display totals
@@ -511,49 +605,39 @@ if totals:
     # Show a compact totals table
     # Build table with Subtotal, Tax share and Total
     rows = []
-    # Precompute subtotals and total_sub
-    subtotals = {
-        p: round(person_total(p), 2)
-        for p in st.session_state.people.keys()
-        if any(st.session_state.shares[p].values())
-    }
-    total_sub = sum(subtotals.values())
-    tax_total = float(st.session_state.get("tax", 0.0))
     for p, total in totals.items():
-        sub = subtotals.get(p, 0.0)
-        tax_share = (sub / total_sub * tax_total) if total_sub > 0 else 0.0
         rows.append(
             {
                 "Person": p,
                 "Email": st.session_state.people.get(p, {}).get("email", ""),
-                "Subtotal": sub,
-                "Tax": tax_share,
+                "Subtotal": subtotals.get(p, 0.0),
+                "Tax": tax_shares.get(p, 0.0),
                 "Total": total,
             }
         )
     df_totals = pd.DataFrame(rows)
     # Format numeric columns
-    for col in ["Subtotal", "Tax", "Total"]:
-        if col in df_totals.columns:
-            df_totals[col] = df_totals[col].apply(fmt_num)
-    st.table(df_totals)
+    st.table(
+        df_totals.style.format({"Subtotal": fmt_num, "Tax": fmt_num, "Total": fmt_num})
+    )
 
-    # More informative per-person breakdowns
-    for p, total in totals.items():
-        with st.expander(f"{p} — {fmt_num(total)}"):
-            email = st.session_state.people.get(p, {}).get("email", "")
-            if email:
-                st.write(f"Email: {email}")
-            bd = person_breakdown(p)
-            if bd:
-                df_bd = pd.DataFrame(bd)
-                # Format numeric columns
-                for col in ["qty", "unit", "subtotal"]:
-                    if col in df_bd.columns:
-                        df_bd[col] = df_bd[col].apply(fmt_num)
-                st.table(df_bd)
-            else:
-                st.write("No items assigned.")
+    # More informative per-person breakdowns (built only on request, since
+    # Streamlit runs expander bodies even while they are collapsed)
+    if st.checkbox("Show per-person details"):
+        for p, total in totals.items():
+            with st.expander(f"{p} — {fmt_num(total)}"):
+                email = st.session_state.people.get(p, {}).get("email", "")
+                if email:
+                    st.write(f"Email: {email}")
+                bd = person_breakdown(p, up)
+                if bd:
+                    df_bd = pd.DataFrame(bd)
+                    # Format numeric columns
+                    st.table(
+                        df_bd.style.format({"qty": fmt_num, "unit": fmt_num, "subtotal": fmt_num})
+                    )
+                else:
+                    st.write("No items assigned.")
 
     # Show payment accounts prominently
     st.markdown("**Payment Accounts / Where to send payment**")
@@ -564,11 +648,12 @@ if totals:
     st.markdown("You can either open an email draft (your mail client) or send directly from this app via SMTP.")
     # mailto links (keep as alternative)
     with st.expander("Open email draft in your email client (mailto)"):
+        tax_total = float(st.session_state.get("tax", 0.0))
         for person, total in totals.items():
             email = st.session_state.people.get(person, {}).get("email", "")
             if not email:
                 continue
-            body = build_email_body(person)
+            body = build_email_body(person, up, subtotals, total_sub, tax_total)
             # include restaurant name in subject if provided
             rest_name = st.session_state.get("restaurant", {}).get("name", "")
             subject = f"Split Bill Summary{(': ' + rest_name) if rest_name else ''}"
@@ -583,7 +668,7 @@ if totals:
             )
 
     # Download summary as image
-    img_buf = build_bill_image(totals)
+    img_buf = BytesIO(build_bill_image(totals, up))
     st.subheader("Download Bill as Image")
     st.download_button(
         label="📥 Download Summary PNG",
@@ -605,4 +690,6 @@ if st.button("Reset All Data"):
     st.session_state["items"] = {}
     st.session_state.people = {}
     st.session_state.shares = defaultdict(lambda: defaultdict(float))
+    st.session_state["used"] = defaultdict(float)
+    st.session_state["active_payers"] = set()
     st.experimental_rerun()